@@ -2,244 +2,397 @@
 
 import os
 import re
+import sys
+import json
 import inspect
+import hashlib
+import logging
 import argparse
+import importlib
+from functools import cached_property, lru_cache
+from concurrent.futures import ThreadPoolExecutor
 
-import wandb
-from lazydocs import MarkdownGenerator
+logger = logging.getLogger(__name__)
 
-###### USE LOCAL VERSION OF WANDB for debugging ######
-# import sys
-# from pathlib import Path
-# # Path to the local version of the `wandb` package
-# local_wandb_path = Path("path/to/local/wandb")
+# Regex to match the start of `__all__` with flexible spacing
+_ALL_START_PATTERN = re.compile(r'__all__\s*=\s*\(')
+# Regex to extract individual items
+_ITEM_PATTERN = re.compile(r'"(.*?)"')
+# Regex to detect # doc:exclude
+_EXCLUDE_PATTERN = re.compile(r'#\s*doc:exclude')
 
-# # Add the local package path to sys.path
-# sys.path.insert(0, str(local_wandb_path))
+# MarkdownGenerator method used to render each supported object type
+_MARKDOWN_GENERATORS = {
+    "class": "class2md",
+    "function": "func2md",
+}
+
+
+@lru_cache(maxsize=None)
+def _getfile(obj):
+    """Cached `inspect.getfile()`. Objects re-exported under several names resolve once."""
+    return inspect.getfile(obj)
+
+
+# Overview entries of every generated API, kept next to the markdown files so that
+# README.md can be rebuilt when --incremental skips a file
+_OVERVIEW_CACHE_FILENAME = ".overview.json"
+
+# Marks an API name that has not been looked up on its module
+_UNRESOLVED = object()
 
-# # Confirm the correct version of wandb is being used
-# import wandb
-# print("Using wandb from:", wandb.__file__)
-###### END ######
 
 class DocodileMaker:
-    def __init__(self, module, api, output_dir):
+    def __init__(self, module, api, output_dir, object_attribute=_UNRESOLVED):
         self.module = module
         self.api_item = api
         self.output_dir = output_dir
-        self._object_attribute = None
-        self._object_type = None
-        self._file_path = None
-        self._filename = None
-
-    def _ensure_object_attribute(self):
-        """Ensure `_object_attribute` is initialized."""
-        if self._object_attribute is None:
-            self._object_attribute = getattr(self.module, self.api_item)
-            self._update_object_type()
-            self._update_file_path()
-            self._update_filename()
-
-    def _update_object_type(self):
-        """Determine the type of the object."""
-        attr_type = str(type(self._object_attribute))
-        if attr_type == "<class 'type'>":
-            self._object_type = "class"
-        elif attr_type == "<class 'function'>":
-            self._object_type = "function"
-        else:
-            self._object_type = "other"
-
-    def _update_file_path(self):
-        """Determine the file path of the object."""
-        try:
-            self._file_path = inspect.getfile(self._object_attribute)
-        except TypeError:
-            self._file_path = None  # Handle cases where `inspect.getfile()` fails.
+        if object_attribute is not _UNRESOLVED:
+            # Already looked up by the caller. Seed the cached property with it.
+            self.object_attribute_value = object_attribute
 
-    def _update_filename(self):
-        """Determine the filename of the object."""
-        self._filename = os.path.join(os.getcwd(), self.output_dir, self.api_item + ".md")  
+    # Each attribute is computed on first access and then stored on the instance.
+    # Only the object type is needed to filter APIs, so the file path and filename
+    # are never computed for objects that do not get documented.
 
-    @property
+    @cached_property
     def object_attribute_value(self):
-        self._ensure_object_attribute()
-        return self._object_attribute
+        """The object exported under the API name."""
+        return getattr(self.module, self.api_item)
 
-    @property
+    @cached_property
     def object_type(self):
-        self._ensure_object_attribute()
-        return self._object_type
+        """Determine the type of the object."""
+        if inspect.isclass(self.object_attribute_value):
+            return "class"
+        elif inspect.isfunction(self.object_attribute_value):
+            return "function"
+        elif inspect.ismodule(self.object_attribute_value):
+            return "module"
+        else:
+            return "other"
 
-    @property
+    @cached_property
     def getfile_path(self):
-        self._ensure_object_attribute()
-        print("File path:", self._file_path)
-        # if self._file_path is None:
+        """Determine the file path of the object."""
+        try:
+            file_path = _getfile(self.object_attribute_value)
+        except TypeError:
+            file_path = None  # Handle cases where `inspect.getfile()` fails.
+        logger.info("File path: %s", file_path)
+        # if file_path is None:
         #     raise ValueError("File path is not available for the specified object.")
-        return self._file_path
-    
-    @property
+        return file_path
+
+    @cached_property
     def filename(self):
-        self._ensure_object_attribute()
-        return self._filename
+        """Determine the filename of the object."""
+        return os.path.join(self.output_dir, self.api_item + ".md")
 
 
 def get_api_list_from_pyi(file_path):
     """Get list of public APIs from a .pyi file. Exclude APIs marked with # doc:exclude.
 
+    Results are cached per file path and modification time, so the file is only
+    parsed again after it changes.
+
     Args:
         file_path (str): Path to the .pyi file.
     """
-    # Debug variables
-    raw_content = ""
-    matched_all_content = ""
-
-    # Adjusted regex to match `__all__` with more flexible spacing and comments
-    all_pattern = re.compile(r'__all__\s*=\s*\((.*?)\)', re.DOTALL)
-    # Regex to extract individual items
-    item_pattern = re.compile(r'"(.*?)"')
-    # Regex to detect # doc:exclude
-    exclude_pattern = re.compile(r'#\s*doc:exclude')
-
+    # Key the cache on the absolute path so relative and absolute spellings share an entry
+    file_path = os.path.abspath(file_path)
     try:
-        with open(file_path, "r") as f:
-            raw_content = f.read()  # Read file content
-    except Exception as e:
-        print(f"Error reading file: {e}")
+        mtime = os.path.getmtime(file_path)
+    except OSError as e:
+        logger.error("Error reading file: %s", e)
         return []
+    return list(_parse_api_list_from_pyi(file_path, mtime))
 
-    # Match `__all__` section
-    match = all_pattern.search(raw_content)
-    if match:
-        matched_all_content = match.group(1)
-        print("Matched __all__ content:\n", matched_all_content)
-    else:
-        print("__all__ definition not found!")
-        return []
 
-    # Process the matched content line by line
+@lru_cache(maxsize=None)
+def _parse_api_list_from_pyi(file_path, mtime):
+    """Parse the public APIs of a .pyi file. `mtime` is only used as part of the cache key.
+
+    Args:
+        file_path (str): Path to the .pyi file.
+        mtime (float): Modification time of the .pyi file.
+    """
     filtered_items = []
-    for line in matched_all_content.splitlines():
-        if exclude_pattern.search(line):
-            continue  # Skip lines with # doc:exclude
-        item_match = item_pattern.search(line)
-        if item_match:
-            filtered_items.append(item_match.group(1))
+    in_all = False
 
-    return filtered_items
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            # Stream the file and stop reading as soon as the `__all__` tuple is closed
+            for line in f:
+                if not in_all:
+                    start_match = _ALL_START_PATTERN.search(line)
+                    if start_match is None:
+                        continue
+                    in_all = True
+                    line = line[start_match.end():]
+
+                # Ignore comments when looking for items and the closing parenthesis
+                code = line.split("#", 1)[0]
+                if not _EXCLUDE_PATTERN.search(line):  # Skip lines with # doc:exclude
+                    item_match = _ITEM_PATTERN.search(code)
+                    if item_match:
+                        filtered_items.append(item_match.group(1))
+                if ")" in code:
+                    break
+    except Exception as e:
+        logger.error("Error reading file: %s", e)
+        return ()
 
+    if not in_all:
+        logger.warning("__all__ definition not found!")
+        return ()
 
-def _title_key_string(docodile):
-    base_name = os.path.basename(docodile.filename).split('.')[0]
-    return f"title: {base_name}\n"
+    logger.info("Matched __all__ items: %s", filtered_items)
+    # Drop repeated names, keeping the first occurrence, so no API is generated twice
+    return tuple(dict.fromkeys(filtered_items))
 
-def _type_key_string(docodile):
-    if "data_type" in docodile.getfile_path:
-        return f"object_type: data_type\n"
-    else:
-        return f"object_type: api\n"
 
-def add_frontmatter(docodile):
+def add_frontmatter(docodile, source_hash=None):
     """Add frontmatter to the markdown file.
     
     Args:
-        filename (str): Name of the file.
+        docodile (DocodileMaker): Docodile object.
+        source_hash (str): Fingerprint of the source file the docs are generated from.
     """
-    return "---\n" + _title_key_string(docodile) + _type_key_string(docodile) + "---\n\n"
+    # The markdown filename is built from the API name, so use it as the title directly
+    object_type = "data_type" if "data_type" in docodile.getfile_path else "api"
+    source_hash_line = f"source_hash: {source_hash}\n" if source_hash is not None else ""
+    return f"---\ntitle: {docodile.api_item}\nobject_type: {object_type}\n{source_hash_line}---\n\n"
 
 
-def _github_button(href_links):
-    """To do: Add hugo scripting to add this function. For now, just add code line # for debugging.
-    
+def get_source_hash(file_path):
+    """Compute a short fingerprint of a source file's contents.
+
+    Results are cached per file path and modification time, so a module that
+    exports several APIs is only read and hashed once.
+
+    Args:
+        file_path (str): Path to the source file.
+    """
+    file_path = os.path.abspath(file_path)
+    return _hash_source_file(file_path, os.path.getmtime(file_path))
+
+
+@lru_cache(maxsize=None)
+def _hash_source_file(file_path, mtime):
+    """Hash the contents of a source file. `mtime` is only used as part of the cache key.
+
     Args:
-        href_links (str): URL for the GitHub button.
+        file_path (str): Path to the source file.
+        mtime (float): Modification time of the source file.
     """
-    return "{{< cta-button githubLink=" + href_links + " >}}"+ "\n\n"
+    with open(file_path, "rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=8).hexdigest()
 
 
-def format_github_button(filename, base_url="https://github.com/wandb/wandb/blob/main/wandb"):
+def read_source_hash(filename):
+    """Read the source fingerprint stored in the frontmatter of a generated markdown file.
+
+    Only the frontmatter is read. Returns None if the file or the fingerprint does not exist.
+
+    Args:
+        filename (str): Name of the markdown file.
+    """
+    try:
+        with open(filename, 'r', encoding='utf-8') as file:
+            if file.readline() != "---\n":
+                return None
+            for line in file:
+                if line == "---\n":
+                    break
+                if line.startswith("source_hash:"):
+                    return line.partition(":")[2].strip()
+    except FileNotFoundError:
+        return None
+    return None
+
+
+def format_github_button(filename, base_url="https://github.com/wandb/wandb/blob/main/wandb/"):
     """Add GitHub button to the markdown file.
     
     Args:
         filename (str): Name of the file.
         base_url (str): Base URL for the GitHub button.
     """
-    def _extract_filename_from_path(path: str) -> str:
-        # Only get path after "wandb/" in the URL
-        _, _, wandb_path = path.partition("wandb/")
-        return wandb_path
-
-    href_links = os.path.join(base_url, _extract_filename_from_path(filename))
-    return _github_button(href_links)
-
-def create_markdown(docodile, generator):
+    # Only keep the path inside the wandb package. Use the last "/wandb/" so that
+    # checkouts such as ".../GitHub/wandb/wandb/sdk/..." resolve to "sdk/..."
+    _, sep, wandb_path = filename.rpartition("/wandb/")
+    # Outside the wandb package there is no file to link to, so link the package root
+    href_link = base_url + wandb_path if sep else base_url
+    return "{{< cta-button githubLink=" + href_link + " >}}\n\n"
+
+def create_markdown(docodile, generator, incremental=False):
     """Create markdown file for the API.
     
     Args:
         docodile (DocodileMaker): Docodile object.
         generator (MarkdownGenerator): Markdown generator object.
         filename (str): Name of the file.
+        incremental (bool): Skip the file if the fingerprint of its source file matches the one stored in it.
     """
-    print("Opening file:", docodile.filename)
-
-    with open(docodile.filename, 'w') as file:
-        file.write(add_frontmatter(docodile))
-        file.write(format_github_button(docodile.getfile_path))
-        file.write("\n\n")
-
-        if docodile.object_type == "class":
-            print("Creating class markdown", "\n\n")
-            file.write(generator.class2md(docodile.object_attribute_value))
-        elif docodile.object_type == "function":
-            print("Creating function markdown", "\n\n")
-            file.write(generator.func2md(docodile.object_attribute_value))
-        else:
-            print("No doc generator for this object type")
+    source_hash = None
+    if docodile.getfile_path:
+        # Only the content fingerprint decides whether a file is unchanged. Modification
+        # times are not reliable across checkouts or copies that preserve them.
+        source_hash = get_source_hash(docodile.getfile_path)
+        if incremental and read_source_hash(docodile.filename) == source_hash:
+            logger.info("Skipping unchanged file: %s", docodile.filename)
+            return False
+
+    method_name = _MARKDOWN_GENERATORS.get(docodile.object_type)
+    if method_name is not None:
+        logger.info("Creating %s markdown for %s", docodile.object_type, docodile.api_item)
+        body = getattr(generator, method_name)(docodile.object_attribute_value)
+    else:
+        logger.warning("No doc generator for object type '%s' of %s", docodile.object_type, docodile.api_item)
+        body = ""
 
+    # Render the whole document first so it is written with a single call and no
+    # partially written file is left behind if lazydocs fails
+    markdown = add_frontmatter(docodile, source_hash) + format_github_button(docodile.getfile_path) + "\n\n" + body
+
+    logger.info("Opening file: %s", docodile.filename)
+
+    # Encode once and write the bytes directly, bypassing the text layer
+    with open(docodile.filename, 'wb') as file:
+        file.write(markdown.encode('utf-8'))
+    return True
+
+
+def render_markdown(docodile, src_base_url, incremental=False):
+    """Create the markdown file for a single API with its own MarkdownGenerator.
+
+    A separate generator per API lets calls run in parallel. Returns the overview
+    entries recorded by the generator, or None if the file was left unchanged.
 
-def check_temp_dir(temp_output_dir):
-    """Check if temporary directory exists.
-    
     Args:
-        temp_output_dir (str): Name of the temporary output directory.
+        docodile (DocodileMaker): Docodile object.
+        src_base_url (str): Base URL for source links.
+        incremental (bool): Skip the file if the fingerprint of its source file matches the one stored in it.
     """
-    if not os.path.exists(temp_output_dir):
-        os.makedirs(temp_output_dir)
+    from lazydocs import MarkdownGenerator
+
+    generator = MarkdownGenerator(src_base_url=src_base_url)
+    if not create_markdown(docodile, generator, incremental):
+        return None
+    return generator.generated_objects
+
+
+def read_overview_cache(output_dir):
+    """Read the overview entries stored by the last run, keyed by API name.
+
+    Returns an empty dict if there is no cache or it cannot be read.
+
+    Args:
+        output_dir (str): Directory with the generated markdown files.
+    """
+    try:
+        with open(os.path.join(output_dir, _OVERVIEW_CACHE_FILENAME), 'r', encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+    except ValueError as e:
+        logger.warning("Ignoring unreadable overview cache: %s", e)
+        return {}
+
+
+def write_overview_cache(output_dir, overview_entries):
+    """Store the overview entries of every API so the next run can rebuild README.md.
+
+    Args:
+        output_dir (str): Directory with the generated markdown files.
+        overview_entries (dict): Overview entries keyed by API name.
+    """
+    with open(os.path.join(output_dir, _OVERVIEW_CACHE_FILENAME), 'w', encoding='utf-8') as file:
+        json.dump(overview_entries, file)
+
+
+def import_wandb(wandb_src=None):
+    """Import the `wandb` package, optionally from a local checkout.
+
+    Args:
+        wandb_src (str): Path to a local clone of the wandb repository. If set, it is put
+            at the front of `sys.path` so its `wandb` package is used instead of the installed one.
+    """
+    if wandb_src:
+        sys.path.insert(0, wandb_src)
+    wandb = importlib.import_module("wandb")
+    # Confirm the correct version of wandb is being used
+    logger.info("Using wandb from: %s", wandb.__file__)
+    return wandb
 
 
 def main(args):
-    module = wandb
+    # lazydocs is only needed to generate docs, not to import this module or show --help
+    from lazydocs import MarkdownGenerator
+
     src_base_url = "https://github.com/wandb/wandb/tree/main/"
-    valid_object_types = ["class", "function"]
 
-    # Check if temporary directory exists. We use this directory to store generated markdown files.
-    # A second script will process these files to clean them up.
-    check_temp_dir(args.temp_output_directory)
+    # Per-file progress messages are only shown with --verbose
+    logging.basicConfig(format="%(message)s", level=logging.INFO if args.verbose else logging.WARNING)
 
-    # Create MarkdownGenerator object. We use the same generator object for all APIs.
-    generator = MarkdownGenerator(src_base_url=src_base_url)
+    module = import_wandb(args.wandb_src)
+
+    # Create the temporary directory if needed. We use this directory to store generated markdown files.
+    # A second script will process these files to clean them up.
+    os.makedirs(args.temp_output_directory, exist_ok=True)
+    output_dir = os.path.join(os.getcwd(), args.temp_output_directory)
 
     # Get list of public APIs. Exclude APIs marked with # doc:exclude.
-    api_list = get_api_list_from_pyi("/Users/noahluna/Documents/GitHub/wandb/wandb/__init__.pyi")
+    api_list = get_api_list_from_pyi(os.path.join(os.path.dirname(module.__file__), "__init__.pyi"))
 
-    # Generate markdown files for each API
+    # Resolve each API once, up front, so that the generation loop only sees names the module
+    # defines. getattr (not vars(module)) so that lazily loaded module attributes resolve too.
+    docodiles = []
     for api_list_item in api_list:
-
-        # Create Docodile object
-        docodile = DocodileMaker(module, api_list_item, args.temp_output_directory)
-
-        # Check if object type defined in source code is valid
-        if docodile.object_type in valid_object_types:
-            # Create markdown file for the API
-            create_markdown(docodile, generator)
+        object_attribute = getattr(module, api_list_item, _UNRESOLVED)
+        if object_attribute is _UNRESOLVED:
+            logger.warning("Skipping %s: not found in %s", api_list_item, module.__name__)
+            continue
+        docodiles.append(DocodileMaker(module, api_list_item, output_dir, object_attribute))
+
+    # Keep the Docodile objects whose object type defined in source code is valid
+    docodiles = [docodile for docodile in docodiles if docodile.object_type in _MARKDOWN_GENERATORS]
+
+    # A file can only be skipped if its overview entries from the last run are known,
+    # otherwise README.md could not list it
+    cached_entries = read_overview_cache(output_dir) if args.incremental else {}
+
+    # Generate markdown files for each API in parallel. Results come back in API order.
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        overview_entries = list(executor.map(
+            lambda docodile: render_markdown(docodile, src_base_url, docodile.api_item in cached_entries),
+            docodiles,
+        ))
+
+    # Skipped files reuse their entries from the last run. APIs that are no longer
+    # exported are dropped from the cache and from the overview.
+    overview_entries = {
+        docodile.api_item: entries if entries is not None else cached_entries[docodile.api_item]
+        for docodile, entries in zip(docodiles, overview_entries)
+    }
+    write_overview_cache(output_dir, overview_entries)
+
+    # Create MarkdownGenerator object for the overview from the entries of every API
+    generator = MarkdownGenerator(src_base_url=src_base_url)
+    for entries in overview_entries.values():
+        generator.generated_objects.extend(entries)
 
     # Generate overview markdown
-    with open(os.path.join(os.getcwd(), args.temp_output_directory, "README.md"), 'w') as file:
+    with open(os.path.join(output_dir, "README.md"), 'w', encoding='utf-8') as file:
         file.write(generator.overview2md())
 
 if __name__  == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--temp_output_directory", default="wandb_sdk_docs", help="directory where the markdown files to process exist")
+    parser.add_argument("--wandb_src", default=os.environ.get("WANDB_SRC"), help="path to a local clone of the wandb repository to generate docs from (defaults to $WANDB_SRC, otherwise the installed wandb package)")
+    parser.add_argument("--incremental", action="store_true", help="only regenerate markdown files whose source file content changed since the last run")
+    parser.add_argument("--verbose", action="store_true", help="print progress for every generated file")
+    parser.add_argument("--workers", type=int, default=None, help="number of threads used to generate markdown files")
     args = parser.parse_args()
     main(args)
@@ -4,10 +4,14 @@ Quick and dirty Python script to post process output markdown files from lazydoc
 """
 import os
 import re
+import logging
 import argparse
 import glob
+from pathlib import Path
 from typing import List, Tuple
 
+logger = logging.getLogger(__name__)
+
 
 class MarkdownCleaner:
     """Utility class for cleaning and processing markdown files."""
@@ -54,24 +58,26 @@ def process_text(markdown_text: str) -> str:
         
 
 def main(args):
+    # Per-file progress messages are only shown with --verbose
+    logging.basicConfig(format="%(message)s", level=logging.INFO if args.verbose else logging.WARNING)
 
     for filename in glob.glob(os.path.join(os.getcwd(), args.output_directory , '*.md')):
-        print(f"Reading in {filename} for processing...")
+        logger.info("Reading in %s for processing...", filename)
         # Read markdown content from file
-        with open(filename, 'r') as file:
-            markdown_text = file.read()
-            
+        markdown_file = Path(filename)
+        markdown_text = markdown_file.read_text(encoding="utf-8")
+
         # Modify markdown content (e.g., remove <img> tags and specified comment)
         cleaned_markdown = process_text(markdown_text)
 
         # Write cleaned markdown content back to file
-        with open(filename, 'w') as file:
-            file.write(cleaned_markdown)
+        markdown_file.write_text(cleaned_markdown, encoding="utf-8")
 
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--output_directory", default="wandb_sdk_docs", help="directory where the markdown files to process exist")
+    parser.add_argument("--verbose", action="store_true", help="print progress for every processed file")
     args = parser.parse_args()
     main(args)
@@ -4,10 +4,44 @@ import os
 import shutil
 import glob
 import re
-import yaml
+import logging
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Only object_type is needed from the frontmatter, so it is matched directly instead of parsing YAML
+_OBJECT_TYPE_PATTERN = re.compile(r"^object_type:\s*(\S+)")
+
+
+def read_frontmatter(filepath):
+    """Return the object_type of a markdown file's frontmatter as a dict, or None if it has no frontmatter.
+
+    Reading stops at the closing '---', so the body of the file is never read.
+    """
+    logger.info("Reading in %s for processing...", filepath)
+
+    frontmatter = {}
+    with open(filepath, 'r') as file:
+        if file.readline() != "---\n":
+            logger.warning("Skipping %s: No frontmatter found.", filepath)
+            return None
+        for line in file:
+            if line.rstrip("\n") == "---":
+                return frontmatter
+            match = _OBJECT_TYPE_PATTERN.match(line)
+            if match:
+                frontmatter["object_type"] = match.group(1)
+
+    # The frontmatter was never closed
+    logger.warning("Skipping %s: No frontmatter found.", filepath)
+    return None
+
 
 def main(args):
+    # Per-file progress messages are only shown with --verbose
+    logging.basicConfig(format="%(message)s", level=logging.INFO if args.verbose else logging.WARNING)
+
     # Directory with processed files
     source_directory = args.source_directory
     root_directory = args.destination_directory
@@ -18,49 +52,38 @@ def main(args):
     os.makedirs(api_dir, exist_ok=True)
     os.makedirs(data_type_dir, exist_ok=True)
 
-    # Pattern to match YAML frontmatter
-    frontmatter_pattern = re.compile(r"^---\n(.*?)\n---", re.DOTALL)    
-
-     # Iterate over markdown files in source directory
-    for filepath in glob.glob(os.path.join(os.getcwd(), source_directory, '*.md')):
-        print(f"Reading in {filepath} for processing...")
-
-        # Read markdown content from file
-        with open(filepath, 'r') as file:
-            content = file.read()
-
-            # Extract frontmatter using regex
-            match = frontmatter_pattern.match(content)
-            if not match:
-                print(f"Skipping {filepath}: No frontmatter found.")
-                continue
-
-            # Parse the frontmatter YAML
-            try:
-                frontmatter = yaml.safe_load(match.group(1))
-            except yaml.YAMLError as e:
-                print(f"Error parsing frontmatter in {filepath}: {e}")
-                continue
-
-            # Determine the target directory based on 'object_type'
-            object_type = frontmatter.get("object_type")
-            if object_type == "api":
-                target_dir = api_dir
-            elif object_type == "data_type":
-                target_dir = data_type_dir
-            else:
-                print(f"Skipping {filepath}: Unknown object_type '{object_type}'.")
-                continue
-
-            # Move the file to the target directory
-            target_path = os.path.join(target_dir, os.path.basename(filepath))
-            shutil.move(filepath, target_path)
-            print(f"Moved {filepath} to {target_path}")
+    filepaths = glob.glob(os.path.join(os.getcwd(), source_directory, '*.md'))
+
+    # Reading frontmatter is I/O bound, so files are read concurrently.
+    # Moves stay serial and in glob order.
+    with ThreadPoolExecutor(max_workers=args.workers) as executor:
+        frontmatters = list(executor.map(read_frontmatter, filepaths))
+
+    for filepath, frontmatter in zip(filepaths, frontmatters):
+        if frontmatter is None:
+            continue
+
+        # Determine the target directory based on 'object_type'
+        object_type = frontmatter.get("object_type")
+        if object_type == "api":
+            target_dir = api_dir
+        elif object_type == "data_type":
+            target_dir = data_type_dir
+        else:
+            logger.warning("Skipping %s: Unknown object_type '%s'.", filepath, object_type)
+            continue
+
+        # Move the file to the target directory
+        target_path = os.path.join(target_dir, os.path.basename(filepath))
+        shutil.move(filepath, target_path)
+        logger.info("Moved %s to %s", filepath, target_path)
     return
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
     parser.add_argument("--source_directory", default="wandb_sdk_docs", help="directory where the markdown files to process exist")
     parser.add_argument("--destination_directory", default="python-library", help="root directory for the processed files")
+    parser.add_argument("--verbose", action="store_true", help="print progress for every moved file")
+    parser.add_argument("--workers", type=int, default=None, help="number of threads used to read frontmatter")
     args = parser.parse_args()
     main(args)
\ No newline at end of file
@@ -5,7 +5,7 @@ Quick and dirty Python script to post process output markdown files from lazydoc
 Note: It might be faster to create this doc using the Generator class and load in modules instead.
 
 TO DO:
-* Add source links to each class, module, etc e.g. #L123. Check note in replace_github_urls
+* Add source links to each class, module, etc e.g. #L123. Check note in replace_github_url
    * Maybe add a new button? Current implementation (that was removed) is an image. Which doesn't work for us since
    we have a rule that expands images to the full width of the page. 
 * Remove temp_processing function, this is a hack around not classes not being hidden
@@ -16,6 +16,25 @@ TO DO:
 import os
 import re
 import argparse
+from pathlib import Path
+
+# Patterns are compiled once at import time and reused for every processed file.
+# Cleanup patterns that cannot affect each other are fused into one alternation so
+# they share a single scan; each named group maps to its replacement in _CLEANUP_REPLACERS.
+_CLEANUP_RE = re.compile("|".join([
+    r'(?P<github_url>(?P<repo_url>https://github\.com/wandb/wandb-workspaces)/tree/main/(?P<path>.*?)/[^/]+#L(?P<line_number>\d+))',
+    r'(?P<module_name>(?P<module_prefix># <kbd>module</kbd> `[\w\.]+)\.[\w]+`)',
+    r'(?P<base_class><a href="[^"]*">\s*<img[^>]*>\s*</a>\s*## <kbd>class</kbd> `Base`)',
+    r'(?P<img><img(?P<img_attrs>.*?)(?P<img_src>src=".*?")>)',
+]))
+# Run as separate passes around _CLEANUP_RE, see remove_patterns_from_markdown
+_GLOBAL_VARIABLE_RE = re.compile(r"(?s)\*\*Global Variables\*\*\n[-]+\n.*?\n---")
+_BOLD_TAGS_RE = re.compile(r'<b>(.*?)</b>')
+_FOOTER_RE = re.compile(r'---\n+_This file was automatically generated via \[lazydocs\]\([^\)]+\)\._\n*')
+_H2_CLASS_RE = re.compile(r'## <kbd>class</kbd> `([^`]+)`')
+_CLASS_SECTION_RE = re.compile(r"(## <kbd>class</kbd> .+?)(?=## <kbd>class</kbd>|$)", re.DOTALL)
+_A_TAG_RE = re.compile(r'<a\b[^>]*>(.*?)</a>', re.DOTALL)
+_GITHUB_MD_URL_RE = re.compile(r"(https://github\.com/.+?/tree/main/)(.+?)\.([\w]+)$")
 
 
 def markdown_title(filename):
@@ -27,45 +46,63 @@ def markdown_title(filename):
     return f"# {base_name}\n\n"
 
 
-def replace_github_urls(text):
+def replace_github_url(match):
     """
     Add the line number to the URL for the GitHub links.
     TO DO: This does not properly fix the URL for the first top most pattern.
     """
-    # Define the pattern to match the URLs
-    pattern = r'(https://github\.com/wandb/wandb-workspaces)/tree/main/(.*?)/([^/]+)#L(\d+)'
-    
-    # Function to replace the match
-    def replacer(match):
-        base_url = match.group(1)
-        path = match.group(2)
-        # Extract just the last directory name and remove everything after it
-        filename = match.group(3)
-        line_number = match.group(4)
-        # Construct the new URL
-        return f"{base_url}/blob/main/{path}.py#L{line_number}"
-    
-    # Use re.sub with the replacer function
-    modified_text = re.sub(pattern, replacer, text)
-    
-    return modified_text
+    # Keep the directory path and drop the trailing filename
+    base_url, path, line_number = match.group("repo_url", "path", "line_number")
+    return f"{base_url}/blob/main/{path}.py#L{line_number}"
 
 
-def remove_patterns_from_markdown(markdown_text):
-    """Remove patterns from the markdown text."""
-    module_name_pattern = r'(# <kbd>module</kbd> `[\w\.]+)\.[\w]+`'
-    global_variable_pattern = r"(?s)\*\*Global Variables\*\*\n[-]+\n.*?\n---"
-    base_class_pattern = r'<a href="[^"]*">\s*<img[^>]*>\s*</a>\s*## <kbd>class</kbd> `Base`'
-    bold_tags_pattern = r'<b>(.*?)</b>'
-    footer_pattern = r'---\n+_This file was automatically generated via \[lazydocs\]\([^\)]+\)\._\n*'
+def fix_img(match):
+    """
+    Taken from Weave code
+    """
+    # Images (used for source code tags) are not closed. While many
+    # html parsers handle this, the markdown parser does not. This
+    # adds a closing slash before the closing bracket.
+    # Example:
+    # <img align="right" src="https://img.shields.io/badge/-source-cccccc?style=flat-square">
+    # becomes
+    # <img align="right" src="https://img.shields.io/badge/-source-cccccc?style=flat-square" />
+    return f"<img{match.group('img_attrs')}{match.group('img_src')} />"
+
+
+_CLEANUP_REPLACERS = {
+    "github_url": replace_github_url,
+    "module_name": lambda match: match.group("module_prefix") + "`",
+    "base_class": lambda match: "",
+    "img": fix_img,
+}
 
-    cleaned_text = re.sub(module_name_pattern, r'\1`', markdown_text)
-    cleaned_text = re.sub(global_variable_pattern, '', cleaned_text).strip()
-    cleaned_text = re.sub(base_class_pattern, '', cleaned_text).strip()
-    cleaned_text = re.sub(bold_tags_pattern, r'\1', cleaned_text)
-    cleaned_text = re.sub(footer_pattern, '', cleaned_text).strip()
 
-    return cleaned_text
+def remove_patterns_from_markdown(markdown_text):
+    """Remove patterns, close image tags and fix GitHub URLs."""
+    # The docgen produces a lot of inline styles, which are not
+    # supported by the markdown parser (taken from Weave code).
+    cleaned_text = markdown_text.replace(' style="float:right;"', "")
+    # Removing inline styles and global variables can complete the Base class pattern, so both go first
+    cleaned_text = _GLOBAL_VARIABLE_RE.sub('', cleaned_text)
+    cleaned_text = _CLEANUP_RE.sub(lambda match: _CLEANUP_REPLACERS[match.lastgroup](match), cleaned_text)
+    # A single scan cannot clean up text nested inside <b> tags, and the footer must see
+    # the newlines left behind once the Base class is removed, so these run afterwards
+    cleaned_text = _BOLD_TAGS_RE.sub(r'\1', cleaned_text)
+    cleaned_text = _FOOTER_RE.sub('', cleaned_text)
+
+    return cleaned_text.strip()
+
+
+def split_blocks(text, separator='---'):
+    """Split text in front of every occurrence of the separator, keeping it with the block that follows."""
+    start = 0
+    index = text.find(separator, 1)
+    while index != -1:
+        yield text[start:index]
+        start = index
+        index = text.find(separator, index + 1)
+    yield text[start:]
 
 
 def alphabetize_headings(markdown_text):
@@ -83,18 +120,16 @@ def alphabetize_headings(markdown_text):
         rest_of_content = ""
     
     # Split the rest of the content into blocks based on the "---" separator
-    blocks = re.split(r'(?=---)', rest_of_content)
+    blocks = split_blocks(rest_of_content)
 
     sections = []
     
-    # Pattern to match H2 headings (classes)
-    h2_pattern = re.compile(r'## <kbd>class</kbd> `([^`]+)`')
-    
     current_section = None
     
     # Iterate over each block to find H2 headings and group content, including H3
     for block in blocks:
-        h2_match = h2_pattern.search(block)
+        # Match H2 headings (classes)
+        h2_match = _H2_CLASS_RE.search(block)
         if h2_match:
             # Extract the class name from the H2 heading
             class_name = h2_match.group(1)
@@ -127,21 +162,15 @@ def temp_processing(content, internal_tag="INTERNAL"):
     #Keyword to look for in the class docstring
     internal_tag = "INTERNAL"
     
-    # Pattern to match class definitions and their content
-    # The pattern matches from '## <kbd>class</kbd>' to the next markdown header or the end of the file
-    class_pattern = re.compile(r"(## <kbd>class</kbd> .+?)(?=## <kbd>class</kbd>|$)", re.DOTALL)
-    
-    # Pattern to match all <a></a> tags and their content
-    a_tag_pattern = re.compile(r'<a\b[^>]*>(.*?)</a>', re.DOTALL)
-    
     # 1. Remove sections that contain the internal tag
-    matches = class_pattern.findall(content)
+    # Class sections run from '## <kbd>class</kbd>' to the next class header or the end of the file
+    matches = _CLASS_SECTION_RE.findall(content)
     for match in matches:
         if internal_tag in match:
             content = content.replace(match, "")
     
     #2. Remove all <a></a> tags
-    content = re.sub(a_tag_pattern, '', content)
+    content = _A_TAG_RE.sub('', content)
 
     return content 
 
@@ -151,9 +180,7 @@ def process_text(markdown_text):
     Silly chain of processing the markdown text.
     """
     # Separating 'temp_processing' because it is a temporary fix
-    markdown_text = alphabetize_headings(replace_github_urls(remove_patterns_from_markdown(fix_style(fix_imgs(markdown_text)))))
-
-    #return alphabetize_headings(replace_github_urls(remove_patterns_from_markdown(fix_style(fix_imgs(markdown_text)))))
+    markdown_text = alphabetize_headings(remove_patterns_from_markdown(markdown_text))
     return temp_processing(markdown_text)    
 
 
@@ -177,11 +204,8 @@ def format_CTA_button(filename, base_url="https://github.com/wandb/wandb-workspa
     """Add GitHub CTA button to the markdown file."""
 
     def _convert_github_md_to_py_url(url: str) -> str:
-        # Define the regex pattern to match the URL and the file extension
-        pattern = r"(https://github\.com/.+?/tree/main/)(.+?)\.([\w]+)$"
-        
         # Replace dots in the path with slashes, change "tree" to "blob", and change ".md" to ".py"
-        result = re.sub(pattern, lambda m: f"{m.group(1).replace('tree', 'blob')}{m.group(2).replace('.', '/')}.py", url)        
+        result = _GITHUB_MD_URL_RE.sub(lambda m: f"{m.group(1).replace('tree', 'blob')}{m.group(2).replace('.', '/')}.py", url)        
         return result
 
     href_links = _convert_github_md_to_py_url(os.path.join(base_url, os.path.basename(filename)))
@@ -189,51 +213,9 @@ def format_CTA_button(filename, base_url="https://github.com/wandb/wandb-workspa
     return "<CTAButtons githubLink='"+ href_links + "'/>\n\n"
 
 
-## The following functions are taken from Weave API Docs ## 
-
-def fix_imgs(text):
-    """
-    Taken from Weave code
-    """
-    # Images (used for source code tags) are not closed. While many
-    # html parsers handle this, the markdown parser does not. This
-    # function fixes that.
-    # Example:
-    # <img align="right" style="float:right;" src="https://img.shields.io/badge/-source-cccccc?style=flat-square">
-    # becomes
-    # <img align="right" style="float:right;" src="https://img.shields.io/badge/-source-cccccc?style=flat-square" />
-
-    # This regex matches the img tag and captures the attributes
-    # and the src attribute.
-    pattern = r'<img(.*?)(src=".*?")>'
-
-    # This function replaces the match with the same match, but with
-    # a closing slash before the closing bracket.
-    def replace_with_slash(match):
-        return f"<img{match.group(1)}{match.group(2)} />"
-
-    # Replace all occurrences of the pattern with the function
-    text = re.sub(pattern, replace_with_slash, text)
-
-    return text
-
-
-def fix_style(text):
-    """
-    Taken from Weave code
-    """    
-    # The docgen produces a lot of inline styles, which are not
-    # supported by the markdown parser.
-    find = ' style="float:right;"'
-    replace = ""
-    text = text.replace(find, replace)
-
-    return text
-
-
 def main(args):
-    with open(args.file, 'r') as file:
-        markdown_text = file.read()
+    markdown_file = Path(args.file)
+    markdown_text = markdown_file.read_text(encoding="utf-8")
 
     # Get the markdown H1 title, and get the original filename
     title = markdown_title(args.file)
@@ -244,11 +226,8 @@ def main(args):
     # Create CTA button format
     github_button = format_CTA_button(args.file)
 
-    with open(args.file, 'w') as file:
-        file.write(add_import_statement())
-        file.write(title)
-        file.write(github_button)
-        file.write(cleaned_markdown)
+    # Assemble the page in memory so it is encoded and written once
+    markdown_file.write_text(add_import_statement() + title + github_button + cleaned_markdown, encoding="utf-8")
 
     # Rename markdown file name 
     rename_markdown_file(args.file)